@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+GTA Batch Runner - Runs a JSONL file of prompts through the GTA pipe's model path concurrently
+
+Each input line is a JSON object with an id ("id" or "request_id") and either
+"messages" (an Open WebUI chat body) or a prompt ("prompt", or "title"/"body").
+An optional "model" picks the model for that request, images or not. Prompts go through
+Pipe.chat, so text/vision routing, the host pool and stats match the chat UI,
+but chat commands (file reads/writes, web search, saves) never fire on batch
+data. Results are appended to the output JSONL as they finish; rerunning with
+the same output skips ids that already succeeded.
+
+    python gta_batch.py requests.jsonl -o results.jsonl -c 4 --valve OLLAMA_HOSTS=http://a:11434,http://b:11434
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from gta_pipe import Pipe
+
+def read_requests(path):
+    """Yield (line_no, request) pairs, skipping blank and malformed lines"""
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError:
+                print(f"[WARN] Skipping malformed line {line_no}", file=sys.stderr)
+
+def request_id(line_no, request):
+    return str(request.get("id") or request.get("request_id") or f"line-{line_no}")
+
+def request_body(request):
+    if request.get("messages"):
+        return {"messages": request["messages"]}
+    prompt = request.get("prompt") or request.get("body") or ""
+    if request.get("title") and not request.get("prompt"):
+        prompt = f"{request['title']}\n\n{prompt}"
+    return {"messages": [{"role": "user", "content": prompt}]}
+
+def completed_ids(output_path):
+    """Ids that already have a successful result in the output file"""
+    done = set()
+    try:
+        # A crash can cut the last line mid-character; it is skipped below either way
+        with open(output_path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # partial line from a crash
+                if not result.get("error"):
+                    done.add(result.get("id"))
+    except FileNotFoundError:
+        pass
+    return done
+
+class BatchRunner:
+    """Drives Pipe.chat per model over a shared Ollama pool and appends results as they finish"""
+    def __init__(self, output_path, concurrency=4, valves=None):
+        self.base = Pipe()
+        if valves:
+            self.base.valves = self.base.Valves(**{**self.base.valves.model_dump(), **valves})
+        self.pipes = {}
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        # Make sure we start on a fresh line if the last run died mid-write.
+        # Checked in binary: the cut may fall inside a multi-byte character.
+        with open(output_path, 'ab+') as f:
+            if f.seek(0, 2):
+                f.seek(-1, 2)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        self.out = open(output_path, 'a', encoding='utf-8')
+        self.ok = 0
+        self.failed = 0
+
+    def model_for(self, request):
+        if request.get("model"):
+            return request["model"]
+        content = (request.get("messages") or [{}])[-1].get("content", "")
+        if isinstance(content, list) and any(isinstance(i, dict) and i.get("type") == "image_url" for i in content):
+            return self.base.valves.VISION_MODEL
+        return self.base.valves.TEXT_MODEL
+
+    def pipe_for(self, model):
+        with self.lock:
+            if model not in self.pipes:
+                pipe = Pipe()
+                # model_for already chose between text and vision, so this pipe runs `model` either way
+                pipe.valves = pipe.Valves(**{**self.base.valves.model_dump(), "TEXT_MODEL": model, "VISION_MODEL": model})
+                pipe._pool = self.base._get_pool()
+                self.pipes[model] = pipe
+            return self.pipes[model]
+
+    def run_one(self, rid, model, request):
+        started = time.time()
+        first_chunk = None
+        chunks = []
+        outcome = {}
+        try:
+            for chunk in self.pipe_for(model).chat(request_body(request), outcome, show_stats=False):
+                if first_chunk is None:
+                    first_chunk = time.time() - started
+                chunks.append(chunk)
+            error = outcome.get("error")
+        except Exception as e:
+            error = str(e)
+        # On failure the pipe's inline error text is reported in "error", not "output"
+        output = "" if error else "".join(chunks).strip()
+        stats = outcome.get("stats") or {}
+        result = {
+            "id": rid,
+            "model": stats.get("model", model),
+            "output": output,
+            "error": error,
+            "stats": {
+                "elapsed_s": round(time.time() - started, 3),
+                "first_chunk_s": round(first_chunk, 3) if first_chunk is not None else None,
+                "output_chars": len(output),
+                "prompt_tokens": stats.get("prompt_tokens"),
+                "completion_tokens": stats.get("completion_tokens"),
+                "total_duration": stats.get("total_duration"),
+                "prompt_eval_duration": stats.get("prompt_time"),
+                "eval_duration": stats.get("eval_time"),
+            },
+        }
+        with self.lock:
+            self.out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            self.out.flush()
+            if error:
+                self.failed += 1
+            else:
+                self.ok += 1
+        print(f"[{'FAIL' if error else 'DONE'}] {rid} ({model}, {result['stats']['elapsed_s']:.1f}s)")
+
+    def run(self, input_path, window=500):
+        """Process the input in windows, grouping each window by model to keep hosts from swapping"""
+        done = completed_ids(self.out.name)
+        if done:
+            print(f"[RESUME] Skipping {len(done)} completed requests")
+        pending = ((request_id(n, r), r) for n, r in read_requests(input_path))
+        pending = ((rid, r) for rid, r in pending if rid not in done)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                batch = list(islice(pending, window))
+                if not batch:
+                    break
+                batch.sort(key=lambda item: self.model_for(item[1]))
+                list(executor.map(lambda item: self.run_one(item[0], self.model_for(item[1]), item[1]), batch))
+        self.out.close()
+        print(f"[BATCH] {self.ok} succeeded, {self.failed} failed")
+        return self.failed == 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through the GTA pipe")
+    parser.add_argument("input", help="Input JSONL file")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="Output JSONL file (appended to, resumable)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--window", type=int, default=500, help="Requests read ahead and grouped by model")
+    parser.add_argument("--valve", action="append", default=[], metavar="KEY=VALUE", help="Override a Pipe valve")
+    args = parser.parse_args()
+
+    valves = dict(v.split("=", 1) for v in args.valve)
+    runner = BatchRunner(args.output, concurrency=args.concurrency, valves=valves)
+    sys.exit(0 if runner.run(args.input, window=args.window) else 1)
+
+if __name__ == "__main__":
+    main()
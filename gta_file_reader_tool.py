@@ -3,6 +3,9 @@ GTA File Reader - Lets the LLM read files directly from /Users/gta/Documents/LLM
 Install as a TOOL in Open WebUI: Admin → Tools → Add Tool
 """
 import os
+import json
+import requests
+import numpy as np
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import Optional
@@ -10,9 +13,12 @@ from typing import Optional
 class Tools:
     class Valves(BaseModel):
         DOCS_DIR: str = Field(default="/Users/gta/Documents/LLM-Docs")
+        INDEX_DIR: str = Field(default="", description="Vector index written by llm_docs_sync.py (defaults to DOCS_DIR/.vector_index)")
+        EMBED_URL: str = Field(default="http://localhost:11434")
 
     def __init__(self):
         self.valves = self.Valves()
+        self._index_cache = None
 
     def list_files(self) -> str:
         """
@@ -126,3 +132,84 @@ class Tools:
             return f"No files found containing '{query}'"
 
         return f"Files containing '{query}':\n\n" + "\n\n".join(results)
+
+    def _load_index(self):
+        index_dir = Path(self.valves.INDEX_DIR) if self.valves.INDEX_DIR else Path(self.valves.DOCS_DIR) / '.vector_index'
+        ids_path = index_dir / 'ids.json'
+        if not ids_path.exists():
+            return None
+        # Reload only when the sync service has rewritten the id table
+        key = (str(ids_path), ids_path.stat().st_mtime_ns)
+        if self._index_cache is None or self._index_cache[0] != key:
+            ids = json.loads(ids_path.read_text())
+            matrix = np.load(index_dir / 'vectors.npy', mmap_mode='r')
+            free = np.array([r is None for r in ids["rows"]], dtype=bool)[:matrix.shape[0]]
+            self._index_cache = (key, ids, matrix, free)
+        return self._index_cache[1:]
+
+    def semantic_search(self, query: str, top_k: int = 5) -> str:
+        """
+        Find the passages in the LLM-Docs folder most similar in meaning to the query.
+        Use this when the exact wording in the files is unknown.
+
+        :param query: A natural-language description of what to look for
+        :param top_k: How many passages to return
+        :return: The best matching passages with their file names and similarity scores
+        """
+        index = self._load_index()
+        if index is None:
+            return "Error: No vector index found. Is llm_docs_sync.py running?"
+        ids, matrix, free = index
+        if free.all():
+            return "The vector index is empty"
+
+        try:
+            response = requests.post(
+                f"{self.valves.EMBED_URL}/api/embed",
+                json={"model": ids["model"], "input": [query]},
+                timeout=60
+            )
+            response.raise_for_status()
+            q = np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+        except Exception as e:
+            return f"Error embedding query: {e}"
+
+        if q.shape != (matrix.shape[1],):
+            return (f"Error: the query embedding has {q.size} dimensions but the index has {matrix.shape[1]}. "
+                    f"Was the index built with a different embedding model?")
+
+        q /= np.linalg.norm(q) or 1.0
+        scores = matrix[:len(free)] @ q
+        scores[free] = -np.inf
+        live = int((~free).sum())
+        k = max(top_k, 1)
+
+        # Rows for files deleted while the sync service was stopped are skipped,
+        # widening the candidate set so they don't cost any of the k results
+        contents = {}
+        seen = set()
+        results = []
+        n = min(live, 4 * k)
+        while len(results) < k and len(seen) < live:
+            top = np.argpartition(-scores, n - 1)[:n]
+            for i in top[np.argsort(-scores[top])]:
+                if i in seen:
+                    continue
+                seen.add(i)
+                rel_path, start, end = ids["rows"][i]
+                if rel_path not in contents:
+                    try:
+                        contents[rel_path] = (Path(self.valves.DOCS_DIR) / rel_path).read_text(encoding='utf-8', errors='replace')
+                    except OSError:
+                        contents[rel_path] = None
+                if contents[rel_path] is None:
+                    continue
+                results.append(f"📄 {rel_path} (score {scores[i]:.3f})\n{contents[rel_path][start:end].strip()}")
+                if len(results) == k:
+                    break
+            n = min(live, 4 * n)
+
+        if not results:
+            return f"No passages found matching '{query}'"
+
+        return f"Passages matching '{query}':\n\n" + "\n\n".join(results)
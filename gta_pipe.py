@@ -4,24 +4,241 @@ GTA - All-in-One: Smart Router + File Access + Web Search
 from pydantic import BaseModel, Field
 from typing import Generator
 import requests
+import numpy as np
 import json
 import re
 import os
+import time
+import shutil
+import tempfile
+import threading
 from pathlib import Path
 
+# Acknowledgements that can precede "save to X" without being a prompt of their own
+FILLER_WORDS = {"ok", "okay", "great", "thanks", "thank", "you", "thx", "perfect", "nice", "cool", "good",
+                "yes", "yep", "sure", "please", "awesome", "excellent", "alright", "now", "so", "very", "much"}
+
+class OllamaHTTPError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+def _tagged(model: str) -> str:
+    # Ollama treats "llama3" and "llama3:latest" as the same model
+    return model if ':' in model else f"{model}:latest"
+
+class OllamaPool:
+    """Routes chat requests across several Ollama hosts with health checks and failover"""
+    def __init__(self, hosts: list[str], check_interval: float = 30.0, probe_timeout: float = 2.0):
+        self.hosts = {h.rstrip('/'): {"healthy": True, "models": set(), "loaded": set(), "inflight": 0, "checked_at": 0.0}
+                      for h in hosts}
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def _probe(self, host: str):
+        try:
+            tags = requests.get(f"{host}/api/tags", timeout=self.probe_timeout)
+            tags.raise_for_status()
+            models = {_tagged(m.get("name", "")) for m in tags.json().get("models", [])}
+            loaded = set()
+            try:
+                ps = requests.get(f"{host}/api/ps", timeout=self.probe_timeout)
+                if ps.status_code == 200:
+                    loaded = {_tagged(m.get("name", "")) for m in ps.json().get("models", [])}
+            except Exception:
+                pass
+            update = {"healthy": True, "models": models, "loaded": loaded}
+        except Exception:
+            update = {"healthy": False}
+        with self.lock:
+            self.hosts[host].update(update, checked_at=time.time())
+
+    def _probe_all(self, hosts: list[str]):
+        threads = [threading.Thread(target=self._probe, args=(h,), daemon=True) for h in hosts]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.ready.set()
+
+    def refresh(self, force: bool = False, wait: bool = False):
+        """Re-probe stale hosts in the background; requests keep routing on the last known state"""
+        now = time.time()
+        with self.lock:
+            stale = [h for h, s in self.hosts.items() if force or now - s["checked_at"] >= self.check_interval]
+            # Claim the probe so concurrent requests don't probe the same host again
+            for h in stale:
+                self.hosts[h]["checked_at"] = now
+        if stale:
+            threading.Thread(target=self._probe_all, args=(stale,), daemon=True).start()
+        # Until the first round of probes lands there is no known state to route on
+        if wait or not self.ready.is_set():
+            self.ready.wait(timeout=2 * self.probe_timeout + 1)
+
+    def candidates(self, model: str) -> list[str]:
+        self.refresh()
+        model = _tagged(model)
+        with self.lock:
+            healthy = [h for h, s in self.hosts.items() if s["healthy"]] or list(self.hosts)
+            # Prefer hosts with the model already in memory, then hosts that have it pulled,
+            # then the least busy; hosts that don't list the model are a last resort.
+            return sorted(healthy, key=lambda h: (
+                model not in self.hosts[h]["loaded"],
+                model not in self.hosts[h]["models"],
+                self.hosts[h]["inflight"],
+            ))
+
+    def _mark_down(self, host: str):
+        with self.lock:
+            self.hosts[host].update(healthy=False, checked_at=time.time())
+
+    def stream_chat(self, payload: dict, timeout: float) -> Generator:
+        """Yield decoded /api/chat lines, failing over to the next host until the first line arrives"""
+        last_error = None
+        for host in self.candidates(payload.get("model", "")):
+            with self.lock:
+                self.hosts[host]["inflight"] += 1
+            started = False
+            response = None
+            try:
+                response = requests.post(f"{host}/api/chat", json=payload, stream=True, timeout=timeout)
+                if response.status_code >= 500:
+                    self._mark_down(host)
+                    last_error = OllamaHTTPError(response.status_code)
+                    continue
+                if response.status_code == 404:
+                    # Host doesn't have the model (stale /api/tags); it is still healthy
+                    with self.lock:
+                        self.hosts[host]["models"].discard(_tagged(payload.get("model", "")))
+                    last_error = OllamaHTTPError(404)
+                    continue
+                if response.status_code != 200:
+                    raise OllamaHTTPError(response.status_code)
+                for line in response.iter_lines():
+                    if line:
+                        try:
+                            data = json.loads(line)
+                        except ValueError:
+                            continue
+                        started = True
+                        yield data
+                if not started:
+                    # Closed before sending anything: nothing reached the caller, so try elsewhere
+                    self._mark_down(host)
+                    last_error = requests.ConnectionError(f"{host} closed the stream without a response")
+                    continue
+                with self.lock:
+                    self.hosts[host]["loaded"].add(_tagged(payload.get("model", "")))
+                return
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if started:
+                    raise
+                self._mark_down(host)
+                last_error = e
+            finally:
+                # Also runs when the caller stops early, so Ollama stops generating on this host
+                if response is not None:
+                    response.close()
+                with self.lock:
+                    self.hosts[host]["inflight"] -= 1
+        raise last_error or requests.ConnectionError("No Ollama hosts configured")
+
+class StreamTee:
+    """Writes streamed chunks to a temp file beside the target and renames it into place on commit.
+
+    With max_bytes and backups set, appending to a file that is already full,
+    or a write that grows past the limit, rolls over like logging's
+    RotatingFileHandler: the target moves to .1 (older copies shift up to
+    `backups`) and a new part is started. Rolled parts stay as temp files until
+    commit, so an aborted stream leaves every existing file untouched. Like
+    RotatingFileHandler with backupCount=0, backups=0 never rolls over.
+    """
+    def __init__(self, path: Path, append: bool = False, max_bytes: int = 0, backups: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes if backups > 0 else 0
+        self.backups = backups
+        self.written = 0
+        self.parts = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        full = append and self.max_bytes and path.exists() and path.stat().st_size >= self.max_bytes
+        self._open(copy_existing=append and path.exists() and not full, rotate=bool(full))
+
+    def _open(self, copy_existing: bool, rotate: bool):
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        os.close(fd)
+        if copy_existing:
+            shutil.copyfile(self.path, tmp)
+        self.file = open(tmp, 'ab')
+        self.size = self.file.tell()
+        self.parts.append((Path(tmp), rotate))
+
+    def _close_part(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{i}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.path.exists():
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+    def write(self, chunk: str):
+        if self.max_bytes and self.size >= self.max_bytes:
+            self._close_part()
+            self._open(copy_existing=False, rotate=True)
+        data = chunk.encode('utf-8')
+        self.file.write(data)
+        self.size += len(data)
+        self.written += len(data)
+
+    def commit(self):
+        self._close_part()
+        for tmp_path, rotate in self.parts:
+            if rotate:
+                self._rotate()
+            os.replace(tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        for tmp_path, _ in self.parts:
+            tmp_path.unlink(missing_ok=True)
+
 class Pipe:
     class Valves(BaseModel):
         OLLAMA_BASE_URL: str = Field(default="http://localhost:11434")
+        OLLAMA_HOSTS: str = Field(default="", description="Comma-separated Ollama hosts to load-balance across (overrides OLLAMA_BASE_URL)")
+        HEALTH_CHECK_INTERVAL: int = Field(default=30, description="Seconds between host health probes")
         TEXT_MODEL: str = Field(default="gpt-oss:120b")
         VISION_MODEL: str = Field(default="llama3.2-vision:90b")
         TEXT_CTX_SIZE: int = Field(default=32768)
         VISION_CTX_SIZE: int = Field(default=131072)
         DOCS_DIR: str = Field(default="/Users/gta/Documents/LLM-Docs")
+        INDEX_DIR: str = Field(default="", description="Vector index written by llm_docs_sync.py (defaults to DOCS_DIR/.vector_index)")
+        EMBED_URL: str = Field(default="http://localhost:11434")
+        TEE_MAX_BYTES: int = Field(default=0, description="Rotate files written by 'and save to' once they reach this size (0 = never)")
+        TEE_BACKUPS: int = Field(default=3, description="Rotated copies to keep (file.1, file.2, ...); 0 disables rotation")
         SERPAPI_KEY: str = Field(default="7fb623579ec799a4f091288f2c25a158c1ad5510f8fca745780641c02657b194")
 
     def __init__(self):
         self.valves = self.Valves()
         self.name = "GTA"
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._index_cache = None
+
+    def _get_pool(self) -> OllamaPool:
+        hosts = [h.strip().rstrip('/') for h in self.valves.OLLAMA_HOSTS.split(',') if h.strip()]
+        hosts = hosts or [self.valves.OLLAMA_BASE_URL.rstrip('/')]
+        with self._pool_lock:
+            if self._pool is None or list(self._pool.hosts) != hosts:
+                self._pool = OllamaPool(hosts, check_interval=self.valves.HEALTH_CHECK_INTERVAL)
+            self._pool.check_interval = self.valves.HEALTH_CHECK_INTERVAL
+            return self._pool
 
     def pipes(self) -> list[dict]:
         return [{"id": "gta", "name": "GTA"}]
@@ -71,6 +288,68 @@ class Pipe:
         except Exception as e:
             return f"Error writing file: {e}"
 
+    def _load_index(self):
+        index_dir = Path(self.valves.INDEX_DIR) if self.valves.INDEX_DIR else Path(self.valves.DOCS_DIR) / '.vector_index'
+        ids_path = index_dir / 'ids.json'
+        if not ids_path.exists():
+            return None
+        key = (str(ids_path), ids_path.stat().st_mtime_ns)
+        if self._index_cache is None or self._index_cache[0] != key:
+            ids = json.loads(ids_path.read_text())
+            matrix = np.load(index_dir / 'vectors.npy', mmap_mode='r')
+            free = np.array([r is None for r in ids["rows"]], dtype=bool)[:matrix.shape[0]]
+            self._index_cache = (key, ids, matrix, free)
+        return self._index_cache[1:]
+
+    def _semantic_search(self, query: str, top_k: int = 5) -> str:
+        index = self._load_index()
+        if index is None:
+            return "No vector index found (is llm_docs_sync.py running?)"
+        ids, matrix, free = index
+        if free.all():
+            return "Vector index is empty"
+        try:
+            response = requests.post(
+                f"{self.valves.EMBED_URL}/api/embed",
+                json={"model": ids["model"], "input": [query]},
+                timeout=60
+            )
+            response.raise_for_status()
+            q = np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+        except Exception as e:
+            return f"Embedding error: {e}"
+        if q.shape != (matrix.shape[1],):
+            return f"Embedding error: query has {q.size} dimensions but the index has {matrix.shape[1]} (index built with a different model?)"
+        q /= np.linalg.norm(q) or 1.0
+        # Rows are stored unit-normalised, so the dot product is the cosine similarity
+        scores = matrix[:len(free)] @ q
+        scores[free] = -np.inf
+        live = int((~free).sum())
+        k = max(top_k, 1)
+        # Widen the candidate set until k rows point at files that still exist,
+        # so stale rows (files removed while the sync service was down) don't eat slots
+        texts, seen, output = {}, set(), []
+        n = min(live, 4 * k)
+        while len(output) < k and len(seen) < live:
+            top = np.argpartition(-scores, n - 1)[:n]
+            for i in top[np.argsort(-scores[top])]:
+                if i in seen:
+                    continue
+                seen.add(i)
+                rel, start, end = ids["rows"][i]
+                if rel not in texts:
+                    try:
+                        texts[rel] = (Path(self.valves.DOCS_DIR) / rel).read_text(encoding='utf-8', errors='replace')
+                    except OSError:
+                        texts[rel] = None
+                if texts[rel] is None:
+                    continue
+                output.append(f"📄 {rel} (score {scores[i]:.3f})\n{texts[rel][start:end].strip()}")
+                if len(output) == k:
+                    break
+            n = min(live, 4 * n)
+        return "\n\n".join(output) if output else "No matching documents"
+
     def _web_search(self, query: str) -> str:
         # Use Google (SerpAPI) if key is set, otherwise DuckDuckGo
         if self.valves.SERPAPI_KEY:
@@ -117,6 +396,27 @@ class Pipe:
         text = text.strip()
         text_lower = text.lower()
 
+        # Generate and save: "<prompt> and save to notes.md" / "<prompt>, append to log.md".
+        # "save it/this/that/the response to X" means the previous reply and is left to write_previous,
+        # as is a bare acknowledgement like "great, save to X".
+        match = re.match(
+            r'^(.*\S)\s*(?:,\s*(?:and\s+|then\s+)?|\s+(?:and|then)\s+(?:then\s+)?)(save|append)\s+'
+            r'to\s+["\']?([^"\'\s]+\.[a-z0-9]+)["\']?[\s.!]*$',
+            text, re.DOTALL | re.IGNORECASE
+        )
+        if match and not set(re.findall(r"[a-z']+", match.group(1).lower())) <= FILLER_WORDS:
+            inner_op = self._check_special_request(match.group(1))[0]
+            if inner_op:
+                # Only model answers are teed; searches, reads and writes have no generation to save
+                return 'tee_unsupported', match.group(3), inner_op
+            op = 'tee_append' if match.group(2).lower() == 'append' else 'tee'
+            return op, match.group(3), match.group(1)
+
+        # Semantic search over the local vector index
+        for prefix in ['docs:', 'semantic:']:
+            if text_lower.startswith(prefix):
+                return 'semantic', text[len(prefix):].strip(), ''
+
         # Web search triggers - check ANYWHERE in the message
         for prefix in ['google:', 'web:', 'search:', 'find online:', 'lookup:']:
             idx = text_lower.find(prefix)
@@ -155,7 +455,7 @@ class Pipe:
         # Write file with content in message
         write_patterns = [
             r'(?:write|save|create) (?:a )?(?:file )?(?:called |named )?["\']?([^"\']+\.[a-z]+)["\']? with (?:content|contents)?[:\s]*(.+)',
-            r'(?:write|save) to ["\']?([^"\']+\.[a-z]+)["\']?[:\s]*(.+)',
+            r'(?:write|save) to ["\']?([^"\']+\.[a-z]+)\b["\']?[:\s]*(.+)',
         ]
         for pattern in write_patterns:
             match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
@@ -172,18 +472,10 @@ class Pipe:
 
         return '', '', ''
 
-    def pipe(self, body: dict) -> Generator:
-        messages = body.get("messages", [])
-        if not messages:
-            yield "No messages provided"
-            return
-
-        last_msg = messages[-1]
-        content = last_msg.get("content", "")
+    def _parse_content(self, content) -> tuple[str, list, bool]:
         has_image = False
         images = []
         text_content = ""
-
         if isinstance(content, list):
             for item in content:
                 if isinstance(item, dict):
@@ -201,6 +493,37 @@ class Pipe:
                     text_content += item
         else:
             text_content = content
+        return text_content, images, has_image
+
+    def _format_stats(self, stats: dict) -> Generator:
+        total_sec = stats["total_duration"] / 1e9
+        prompt_sec = stats["prompt_time"] / 1e9 if stats["prompt_time"] else 0.001
+        eval_sec = stats["eval_time"] / 1e9 if stats["eval_time"] else 0.001
+        prompt_tps = stats["prompt_tokens"] / prompt_sec
+        gen_tps = stats["completion_tokens"] / eval_sec
+        total_tokens = stats["prompt_tokens"] + stats["completion_tokens"]
+        ctx_used = (total_tokens / stats["ctx_size"]) * 100
+        ctx_bar_filled = int(ctx_used / 5)
+        ctx_bar = "█" * ctx_bar_filled + "░" * (20 - ctx_bar_filled)
+
+        yield f"\n\n<details>\n<summary>ℹ️ {stats['model']} • {total_sec:.1f}s • {total_tokens:,} tokens</summary>\n\n"
+        yield f"| Metric | Value |\n|--------|-------|\n"
+        yield f"| Model | `{stats['model']}` |\n"
+        yield f"| Total Time | {total_sec:.1f}s |\n"
+        yield f"| Prompt | {stats['prompt_tokens']:,} tokens @ {prompt_tps:.1f} t/s |\n"
+        yield f"| Generated | {stats['completion_tokens']:,} tokens @ {gen_tps:.1f} t/s |\n"
+        yield f"| Context | {ctx_bar} {ctx_used:.1f}% ({total_tokens:,}/{stats['ctx_size']:,}) |\n"
+        yield f"\n</details>"
+
+    def pipe(self, body: dict) -> Generator:
+        messages = body.get("messages", [])
+        if not messages:
+            yield "No messages provided"
+            return
+
+        last_msg = messages[-1]
+        content = last_msg.get("content", "")
+        text_content, images, has_image = self._parse_content(content)
 
         # Check for special operations first
         op, arg1, arg2 = self._check_special_request(text_content)
@@ -232,34 +555,24 @@ INSTRUCTIONS:
             stats = {}
 
             try:
-                response = requests.post(
-                    f"{self.valves.OLLAMA_BASE_URL}/api/chat",
-                    json={"model": model, "messages": search_messages, "stream": True},
-                    stream=True,
+                for data in self._get_pool().stream_chat(
+                    {"model": model, "messages": search_messages, "stream": True},
                     timeout=300
-                )
-
-                if response.status_code == 200:
-                    for line in response.iter_lines():
-                        if line:
-                            try:
-                                data = json.loads(line)
-                                chunk = data.get("message", {}).get("content", "")
-                                if chunk:
-                                    yield chunk
-                                if data.get("done"):
-                                    stats = {
-                                        "model": model,
-                                        "total_duration": data.get("total_duration", 0),
-                                        "prompt_tokens": data.get("prompt_eval_count", 0),
-                                        "completion_tokens": data.get("eval_count", 0),
-                                        "prompt_time": data.get("prompt_eval_duration", 0),
-                                        "eval_time": data.get("eval_duration", 0),
-                                    }
-                            except:
-                                continue
-                else:
-                    yield f"Error getting response: {response.status_code}"
+                ):
+                    chunk = data.get("message", {}).get("content", "")
+                    if chunk:
+                        yield chunk
+                    if data.get("done"):
+                        stats = {
+                            "model": model,
+                            "total_duration": data.get("total_duration", 0),
+                            "prompt_tokens": data.get("prompt_eval_count", 0),
+                            "completion_tokens": data.get("eval_count", 0),
+                            "prompt_time": data.get("prompt_eval_duration", 0),
+                            "eval_time": data.get("eval_duration", 0),
+                        }
+            except OllamaHTTPError as e:
+                yield f"Error getting response: {e.status_code}"
             except Exception as e:
                 yield f"Error: {e}"
 
@@ -281,6 +594,53 @@ INSTRUCTIONS:
                 yield f"| Generated | {stats['completion_tokens']:,} tokens @ {gen_tps:.1f} t/s |\n"
                 yield f"\n</details>"
             return
+        if op == 'tee_unsupported':
+            yield f"**[Error]** Only model answers can be saved while streaming, not `{arg2}` results. Run it first, then say \"save that to {arg1}\"."
+            return
+        if op in ('tee', 'tee_append'):
+            # Send the prompt without the save clause to the model and tee its answer to disk
+            if isinstance(content, list):
+                tee_content = [i for i in content if not (isinstance(i, dict) and i.get("type") == "text") and not isinstance(i, str)]
+                tee_content.append({"type": "text", "text": arg2})
+            else:
+                tee_content = arg2
+            tee_body = {**body, "messages": messages[:-1] + [{**last_msg, "content": tee_content}]}
+            docs_dir = Path(self.valves.DOCS_DIR).resolve()
+            target = (docs_dir / arg1).resolve()
+            if not target.is_relative_to(docs_dir):
+                yield f"**[Error]** Cannot write outside {docs_dir}: {arg1}"
+                return
+            try:
+                tee = StreamTee(target, append=op == 'tee_append',
+                                max_bytes=self.valves.TEE_MAX_BYTES, backups=self.valves.TEE_BACKUPS)
+            except Exception as e:
+                yield f"**[Error]** Cannot write {arg1}: {e}"
+                return
+            outcome = {}
+            try:
+                for chunk in self.chat(tee_body, outcome, show_stats=False):
+                    tee.write(chunk)
+                    yield chunk
+            except BaseException:
+                tee.abort()
+                raise
+            # Only a response Ollama marked done replaces the file; errors and dropped streams leave it alone
+            if not outcome["done"] or outcome["error"]:
+                tee.abort()
+                yield f"\n\n**[Error]** Response incomplete, `{arg1}` was not changed"
+                return
+            try:
+                tee.commit()
+            except Exception as e:
+                tee.abort()
+                yield f"\n\n**[Error]** Cannot write {arg1}: {e}"
+                return
+            yield from self._format_stats(outcome["stats"])
+            yield f"\n\n💾 *{'Appended' if op == 'tee_append' else 'Saved'} {tee.written:,} bytes to `{arg1}`*"
+            return
+        if op == 'semantic':
+            yield f"**[Semantic Search: {arg1}]**\n\n{self._semantic_search(arg1)}"
+            return
         if op == 'list':
             yield f"**[Local Files]**\n\n{self._list_files()}"
             return
@@ -308,6 +668,23 @@ INSTRUCTIONS:
                 yield f"**[Error]** No previous response found to save."
             return
 
+        yield from self.chat(body)
+
+    def chat(self, body: dict, result: dict = None, show_stats: bool = True) -> Generator:
+        """Model path only: text/vision routing through the pool, no special operations.
+
+        If given, `result` is filled in with the raw stats dict, any error
+        message and whether Ollama sent its final done message.
+        """
+        result = result if result is not None else {}
+        result.update(stats={}, error=None, done=False)
+        messages = body.get("messages", [])
+        if not messages:
+            result["error"] = "No messages provided"
+            yield "No messages provided"
+            return
+
+        text_content, images, has_image = self._parse_content(messages[-1].get("content", ""))
         model = self.valves.VISION_MODEL if has_image else self.valves.TEXT_MODEL
         ctx_size = self.valves.VISION_CTX_SIZE if has_image else self.valves.TEXT_CTX_SIZE
 
@@ -322,57 +699,35 @@ INSTRUCTIONS:
                 ollama_messages.append({"role": m.get("role", "user"), "content": c})
 
         try:
-            response = requests.post(
-                f"{self.valves.OLLAMA_BASE_URL}/api/chat",
-                json={"model": model, "messages": ollama_messages, "stream": True},
-                stream=True,
-                timeout=600
-            )
-
-            if response.status_code != 200:
-                yield f"Error: {response.status_code}"
-                return
-
             stats = {}
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        data = json.loads(line)
-                        chunk = data.get("message", {}).get("content", "")
-                        if chunk:
-                            yield chunk
-                        if data.get("done"):
-                            stats = {
-                                "model": model,
-                                "total_duration": data.get("total_duration", 0),
-                                "prompt_tokens": data.get("prompt_eval_count", 0),
-                                "completion_tokens": data.get("eval_count", 0),
-                                "prompt_time": data.get("prompt_eval_duration", 0),
-                                "eval_time": data.get("eval_duration", 0),
-                                "ctx_size": ctx_size
-                            }
-                    except:
-                        continue
-
-            if stats:
-                total_sec = stats["total_duration"] / 1e9
-                prompt_sec = stats["prompt_time"] / 1e9 if stats["prompt_time"] else 0.001
-                eval_sec = stats["eval_time"] / 1e9 if stats["eval_time"] else 0.001
-                prompt_tps = stats["prompt_tokens"] / prompt_sec
-                gen_tps = stats["completion_tokens"] / eval_sec
-                total_tokens = stats["prompt_tokens"] + stats["completion_tokens"]
-                ctx_used = (total_tokens / stats["ctx_size"]) * 100
-                ctx_bar_filled = int(ctx_used / 5)
-                ctx_bar = "█" * ctx_bar_filled + "░" * (20 - ctx_bar_filled)
-
-                yield f"\n\n<details>\n<summary>ℹ️ {stats['model']} • {total_sec:.1f}s • {total_tokens:,} tokens</summary>\n\n"
-                yield f"| Metric | Value |\n|--------|-------|\n"
-                yield f"| Model | `{stats['model']}` |\n"
-                yield f"| Total Time | {total_sec:.1f}s |\n"
-                yield f"| Prompt | {stats['prompt_tokens']:,} tokens @ {prompt_tps:.1f} t/s |\n"
-                yield f"| Generated | {stats['completion_tokens']:,} tokens @ {gen_tps:.1f} t/s |\n"
-                yield f"| Context | {ctx_bar} {ctx_used:.1f}% ({total_tokens:,}/{stats['ctx_size']:,}) |\n"
-                yield f"\n</details>"
-
+            for data in self._get_pool().stream_chat(
+                {"model": model, "messages": ollama_messages, "stream": True},
+                timeout=600
+            ):
+                chunk = data.get("message", {}).get("content", "")
+                if chunk:
+                    yield chunk
+                if data.get("done"):
+                    result["done"] = True
+                    stats = {
+                        "model": model,
+                        "total_duration": data.get("total_duration", 0),
+                        "prompt_tokens": data.get("prompt_eval_count", 0),
+                        "completion_tokens": data.get("eval_count", 0),
+                        "prompt_time": data.get("prompt_eval_duration", 0),
+                        "eval_time": data.get("eval_duration", 0),
+                        "ctx_size": ctx_size
+                    }
+
+            result["stats"] = stats
+            if not result["done"]:
+                result["error"] = "Error: response ended before Ollama finished"
+            if stats and show_stats:
+                yield from self._format_stats(stats)
+
+        except OllamaHTTPError as e:
+            result["error"] = f"Error: {e.status_code}"
+            yield f"Error: {e.status_code}"
         except Exception as e:
+            result["error"] = f"Error: {e}"
             yield f"\n\nError: {str(e)}"
@@ -5,9 +5,11 @@ LLM-Docs Auto-Sync - Watches folder and syncs to Open WebUI Knowledge Base
 import os
 import sys
 import time
+import json
 import hashlib
 import sqlite3
 import requests
+import numpy as np
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -17,8 +19,26 @@ WATCH_DIR = "/Users/gta/Documents/LLM-Docs"
 OPENWEBUI_URL = "http://localhost:8080"
 KNOWLEDGE_NAME = "Local Files"
 SYNC_DB = "/Users/gta/Documents/LLM-Docs/.sync_state.db"
+EMBED_URL = "http://localhost:11434"
+EMBED_MODEL = "nomic-embed-text"
+INDEX_DIR = "/Users/gta/Documents/LLM-Docs/.vector_index"
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 200
+EMBED_BATCH = 32
+MAX_INDEX_SIZE = 500 * 1024
 SUPPORTED_EXTENSIONS = {'.txt', '.md', '.pdf', '.py', '.js', '.ts', '.json', '.yaml', '.yml', '.xml', '.html', '.css', '.sh', '.bash', '.zsh', '.swift', '.go', '.rs', '.java', '.c', '.cpp', '.h', '.hpp', '.sql', '.env', '.csv'}
 
+def is_hidden_path(filepath, watch_dir, index_dir=None):
+    """True for dotfiles, anything under a dot-directory, and the vector index itself"""
+    path = Path(filepath).resolve()
+    if index_dir and path.is_relative_to(Path(index_dir).resolve()):
+        return True
+    try:
+        rel = path.relative_to(Path(watch_dir).resolve())
+    except ValueError:
+        return False
+    return any(part.startswith('.') for part in rel.parts)
+
 class SyncState:
     """Track synced files to avoid duplicates"""
     def __init__(self, db_path):
@@ -103,22 +123,162 @@ class OpenWebUIClient:
             print(f"[ERROR] Upload exception for {filepath}: {e}")
             return None
 
+class EmbeddingClient:
+    """Client for an Ollama-compatible /api/embed endpoint"""
+    def __init__(self, base_url, model):
+        self.base_url = base_url
+        self.model = model
+        self.session = requests.Session()
+
+    def embed(self, texts):
+        response = self.session.post(
+            f"{self.base_url}/api/embed",
+            json={"model": self.model, "input": texts},
+            timeout=300
+        )
+        response.raise_for_status()
+        return np.asarray(response.json()["embeddings"], dtype=np.float32)
+
+class VectorIndex:
+    """Chunk embeddings in a memory-mapped matrix with a JSON id table alongside.
+
+    vectors.npy holds unit-normalised float32 rows; ids.json maps each row to
+    [relative path, start, end] (or null for a free row) and records the hash
+    and rows of every indexed file. New rows are written before ids.json is
+    swapped in and old rows are only zeroed afterwards, so readers never see a
+    row that ids.json doesn't describe.
+    """
+    def __init__(self, index_dir, root_dir, embedder):
+        self.index_dir = Path(index_dir)
+        self.root_dir = Path(root_dir)
+        self.embedder = embedder
+        self.vectors_path = self.index_dir / 'vectors.npy'
+        self.ids_path = self.index_dir / 'ids.json'
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.matrix = None
+        self.ids = {"model": embedder.model, "dim": 0, "rows": [], "files": {}}
+        if self.ids_path.exists() and self.vectors_path.exists():
+            ids = json.loads(self.ids_path.read_text())
+            if ids.get("model") == embedder.model:
+                self.ids = ids
+                self.matrix = np.load(self.vectors_path, mmap_mode='r+')
+
+    def _rel(self, filepath):
+        return Path(filepath).resolve().relative_to(self.root_dir.resolve()).as_posix()
+
+    def _chunks(self, text):
+        step = CHUNK_SIZE - CHUNK_OVERLAP
+        return [(start, min(start + CHUNK_SIZE, len(text)))
+                for start in range(0, max(len(text) - CHUNK_OVERLAP, 1), step)]
+
+    def _allocate(self, n, dim):
+        """Return n free row numbers, growing the matrix file if needed"""
+        rows = self.ids["rows"]
+        free = [i for i, r in enumerate(rows) if r is None][:n]
+        free += range(len(rows), len(rows) + n - len(free))
+        needed = max(free, default=-1) + 1
+        if self.matrix is None or self.matrix.shape[1] != dim or self.matrix.shape[0] < needed:
+            capacity = max(needed, 2 * (0 if self.matrix is None else self.matrix.shape[0]), 256)
+            tmp_path = self.index_dir / 'vectors.tmp.npy'
+            grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, dim))
+            if self.matrix is not None and self.matrix.shape[1] == dim:
+                grown[:self.matrix.shape[0]] = self.matrix
+            grown.flush()
+            del grown
+            os.replace(tmp_path, self.vectors_path)
+            self.matrix = np.load(self.vectors_path, mmap_mode='r+')
+            self.ids["dim"] = dim
+        rows.extend([None] * (needed - len(rows)))
+        return free
+
+    def _save_ids(self):
+        if self.matrix is not None:
+            self.matrix.flush()
+        tmp_path = self.ids_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.ids))
+        os.replace(tmp_path, self.ids_path)
+
+    def _release(self, old_rows):
+        for i in old_rows:
+            self.ids["rows"][i] = None
+        self._save_ids()
+        if old_rows:
+            self.matrix[old_rows] = 0
+            self.matrix.flush()
+
+    def update_file(self, filepath):
+        """Re-embed a file if its content changed since it was last indexed"""
+        rel = self._rel(filepath)
+        if Path(filepath).suffix.lower() == '.pdf':
+            return False
+        if os.path.getsize(filepath) > MAX_INDEX_SIZE:
+            if self.remove_file(filepath):
+                print(f"[INDEX] Dropped (over {MAX_INDEX_SIZE // 1024}KB): {rel}")
+            return False
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        file_hash = hashlib.md5(raw).hexdigest()
+        entry = self.ids["files"].get(rel)
+        if entry and entry["hash"] == file_hash:
+            return False
+        text = raw.decode('utf-8', errors='replace')
+        spans = self._chunks(text) if text.strip() else []
+        new_rows = []
+        if spans:
+            texts = [text[a:b] for a, b in spans]
+            vectors = np.concatenate([self.embedder.embed(texts[i:i + EMBED_BATCH])
+                                      for i in range(0, len(texts), EMBED_BATCH)])
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1, norms)
+            new_rows = self._allocate(len(spans), vectors.shape[1])
+            self.matrix[new_rows] = vectors
+            for i, (a, b) in zip(new_rows, spans):
+                self.ids["rows"][i] = [rel, a, b]
+        self.ids["files"][rel] = {"hash": file_hash, "rows": new_rows}
+        self._release(entry["rows"] if entry else [])
+        return True
+
+    def remove_file(self, filepath):
+        entry = self.ids["files"].pop(self._rel(filepath), None)
+        if entry is None:
+            return False
+        self._release(entry["rows"])
+        return True
+
+    def prune(self):
+        """Drop files that no longer exist on disk"""
+        for rel in list(self.ids["files"]):
+            if not (self.root_dir / rel).exists():
+                self.remove_file(self.root_dir / rel)
+
 class DocSyncHandler(FileSystemEventHandler):
     """Handle file system events"""
-    def __init__(self, sync_state, client):
+    def __init__(self, sync_state, client, index=None, watch_dir=WATCH_DIR):
         self.sync_state = sync_state
         self.client = client
+        self.index = index
+        self.watch_dir = watch_dir
         self.debounce = {}
 
+    def _ignored(self, filepath):
+        # Never feed the index its own files (ids.json would re-trigger itself on every save)
+        return is_hidden_path(filepath, self.watch_dir, self.index.index_dir if self.index else INDEX_DIR)
+
     def _should_sync(self, filepath):
         ext = Path(filepath).suffix.lower()
-        return ext in SUPPORTED_EXTENSIONS
+        return ext in SUPPORTED_EXTENSIONS and not self._ignored(filepath)
 
     def _sync_file(self, filepath):
         if not os.path.exists(filepath):
             return
         if not self._should_sync(filepath):
             return
+        if self.index:
+            try:
+                if self.index.update_file(filepath):
+                    print(f"[INDEX] Embedded: {os.path.basename(filepath)}")
+            except Exception as e:
+                print(f"[ERROR] Indexing failed for {filepath}: {e}")
         if not self.sync_state.needs_sync(filepath):
             return
 
@@ -145,10 +305,23 @@ class DocSyncHandler(FileSystemEventHandler):
         if time.time() - self.debounce.get(event.src_path, 0) >= 0.5:
             self._sync_file(event.src_path)
 
+    def on_moved(self, event):
+        # Atomic saves land as a rename from a temp file
+        if event.is_directory:
+            return
+        if not self._ignored(event.src_path):
+            if self.index and self.index.remove_file(event.src_path):
+                print(f"[INDEX] Removed: {event.src_path}")
+            self.sync_state.remove(event.src_path)
+        if self._should_sync(event.dest_path):
+            self._sync_file(event.dest_path)
+
     def on_deleted(self, event):
         if event.is_directory:
             return
         self.sync_state.remove(event.src_path)
+        if self.index and self.index.remove_file(event.src_path):
+            print(f"[INDEX] Removed: {event.src_path}")
         print(f"[SYNC] Removed from tracking: {event.src_path}")
 
 def initial_sync(watch_dir, sync_state, client):
@@ -172,12 +345,34 @@ def initial_sync(watch_dir, sync_state, client):
                         count += 1
     print(f"[INIT] Synced {count} files")
 
+def initial_index(watch_dir, index):
+    """Embed new or changed files and drop deleted ones from the vector index"""
+    print(f"[INIT] Updating vector index in {index.index_dir}...")
+    index.prune()
+    count = 0
+    for root, dirs, files in os.walk(watch_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for filename in files:
+            if filename.startswith('.'):
+                continue
+            filepath = os.path.join(root, filename)
+            if is_hidden_path(filepath, watch_dir, index.index_dir):
+                continue
+            if Path(filepath).suffix.lower() in SUPPORTED_EXTENSIONS:
+                try:
+                    if index.update_file(filepath):
+                        count += 1
+                except Exception as e:
+                    print(f"[ERROR] Indexing failed for {filepath}: {e}")
+    print(f"[INIT] Embedded {count} files")
+
 def main():
     print("=" * 50)
     print("LLM-Docs Auto-Sync Service")
     print("=" * 50)
     print(f"Watching: {WATCH_DIR}")
     print(f"Target: {OPENWEBUI_URL}")
+    print(f"Embeddings: {EMBED_MODEL} @ {EMBED_URL}")
     print("=" * 50)
 
     # Ensure watch directory exists
@@ -186,6 +381,7 @@ def main():
     # Initialize components
     sync_state = SyncState(SYNC_DB)
     client = OpenWebUIClient(OPENWEBUI_URL)
+    index = VectorIndex(INDEX_DIR, WATCH_DIR, EmbeddingClient(EMBED_URL, EMBED_MODEL))
 
     # Check if API key is configured
     if not client.api_key:
@@ -199,9 +395,10 @@ def main():
     # Do initial sync
     if client.api_key:
         initial_sync(WATCH_DIR, sync_state, client)
+    initial_index(WATCH_DIR, index)
 
     # Set up file watcher
-    handler = DocSyncHandler(sync_state, client)
+    handler = DocSyncHandler(sync_state, client, index)
     observer = Observer()
     observer.schedule(handler, WATCH_DIR, recursive=True)
     observer.start()
@@ -0,0 +1,142 @@
+"""
+Local fake Ollama and embedding servers for exercising the pipe without a GPU host
+"""
+import sys
+import json
+import time
+import socket
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+class FakeOllama:
+    """Minimal /api/tags, /api/ps and streaming /api/chat"""
+    def __init__(self, name, models=(), loaded=(), chat_status=200, chunks=None, done=True,
+                 chunk_delay=0.0, probe_delay=0.0):
+        self.name = name
+        self.models = list(models)
+        self.loaded = list(loaded)
+        self.chat_status = chat_status
+        self.chunks = chunks if chunks is not None else [f"hi from {name}"]
+        self.done = done
+        self.chunk_delay = chunk_delay
+        self.probe_delay = probe_delay
+        self.disconnected = False
+        self.probes = 0
+        self.chats = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _json(self, obj, status=200):
+                data = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    time.sleep(fake.probe_delay)
+                    fake.probes += 1
+                    self._json({"models": [{"name": m} for m in fake.models]})
+                elif self.path == '/api/ps':
+                    self._json({"models": [{"name": m} for m in fake.loaded]})
+                else:
+                    self._json({}, 404)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.chats.append(body)
+                if fake.chat_status != 200:
+                    return self._json({"error": "fake failure"}, fake.chat_status)
+                self.send_response(200)
+                self.end_headers()
+                try:
+                    for chunk in fake.chunks:
+                        self.wfile.write((json.dumps({"message": {"content": chunk}}) + "\n").encode())
+                        self.wfile.flush()
+                        time.sleep(fake.chunk_delay)
+                except (BrokenPipeError, ConnectionResetError):
+                    fake.disconnected = True
+                    return
+                if fake.done:
+                    self.wfile.write((json.dumps({
+                        "message": {"content": ""}, "done": True,
+                        "total_duration": 2_000_000_000, "prompt_eval_count": 5, "eval_count": len(fake.chunks),
+                        "prompt_eval_duration": 500_000_000, "eval_duration": 1_000_000_000,
+                    }) + "\n").encode())
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def fake_ollama():
+    servers = []
+
+    def start(name, **kwargs):
+        servers.append(FakeOllama(name, **kwargs))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.close()
+
+@pytest.fixture
+def dead_url():
+    """A URL nothing is listening on"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+class FakeEmbedder:
+    """Ollama-style /api/embed returning bag-of-words hash vectors"""
+    DIM = 32
+
+    def __init__(self):
+        self.batches = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.batches.append(len(body["input"]))
+                data = json.dumps({"embeddings": [fake.vector(t) for t in body["input"]]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    @classmethod
+    def vector(cls, text):
+        v = [0.0] * cls.DIM
+        for word in text.lower().split():
+            v[sum(map(ord, word)) % cls.DIM] += 1.0
+        return v
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def fake_embedder():
+    server = FakeEmbedder()
+    yield server
+    server.close()
@@ -0,0 +1,65 @@
+import json
+from gta_batch import BatchRunner
+
+def write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+
+def read_jsonl(path):
+    return {r["id"]: r for r in map(json.loads, path.read_text().splitlines())}
+
+def test_batch_skips_chat_commands_and_records_numeric_stats(tmp_path, fake_ollama):
+    a = fake_ollama("A", models=["m:latest"])
+    write_jsonl(tmp_path / "in.jsonl", [
+        {"id": "save", "prompt": "summarise this and save to notes.md"},
+        {"id": "write", "prompt": "write foo.md with content: hello"},
+    ])
+    runner = BatchRunner(tmp_path / "out.jsonl", concurrency=2,
+                         valves={"OLLAMA_HOSTS": a.url, "TEXT_MODEL": "m", "DOCS_DIR": str(tmp_path / "docs")})
+    assert runner.run(tmp_path / "in.jsonl")
+
+    results = read_jsonl(tmp_path / "out.jsonl")
+    assert results["save"]["output"] == "hi from A"
+    assert results["save"]["stats"]["prompt_tokens"] == 5
+    assert results["save"]["stats"]["completion_tokens"] == 1
+    assert results["save"]["stats"]["total_duration"] == 2_000_000_000
+    assert len(a.chats) == 2
+    assert not (tmp_path / "docs").exists()
+
+def test_batch_failures_are_errors_and_retried_on_resume(tmp_path, fake_ollama):
+    a = fake_ollama("A", chat_status=404)
+    write_jsonl(tmp_path / "in.jsonl", [{"id": "x", "prompt": "Error: this answer is fine"}])
+    out = tmp_path / "out.jsonl"
+    runner = BatchRunner(out, valves={"OLLAMA_HOSTS": a.url})
+    assert not runner.run(tmp_path / "in.jsonl")
+    assert read_jsonl(out)["x"]["error"] == "Error: 404"
+
+    a.chat_status = 200
+    a.chunks = ["Error: this answer is fine"]
+    assert BatchRunner(out, valves={"OLLAMA_HOSTS": a.url}).run(tmp_path / "in.jsonl")
+    assert read_jsonl(out)["x"]["error"] is None
+    assert len(a.chats) == 2
+
+def test_resume_after_line_cut_mid_character(tmp_path, fake_ollama):
+    a = fake_ollama("A", chunks=["☕ done"])
+    write_jsonl(tmp_path / "in.jsonl", [{"id": "one", "prompt": "a"}, {"id": "two", "prompt": "b"}])
+    out = tmp_path / "out.jsonl"
+    complete = json.dumps({"id": "one", "output": "☕", "error": None}, ensure_ascii=False) + "\n"
+    out.write_bytes(complete.encode() + '{"id": "two", "output": "☕'.encode()[:-1])
+
+    assert BatchRunner(out, valves={"OLLAMA_HOSTS": a.url}).run(tmp_path / "in.jsonl")
+    assert [c["messages"][-1]["content"] for c in a.chats] == ["b"]
+    lines = out.read_bytes().split(b"\n")
+    assert json.loads(lines[-2])["output"] == "☕ done"
+
+def test_model_override_applies_to_image_requests(tmp_path, fake_ollama):
+    a = fake_ollama("A")
+    image = {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}}
+    write_jsonl(tmp_path / "in.jsonl", [
+        {"id": "custom", "model": "custom", "messages": [{"role": "user", "content": [image, {"type": "text", "text": "what is this"}]}]},
+        {"id": "default", "messages": [{"role": "user", "content": [image]}]},
+    ])
+    runner = BatchRunner(tmp_path / "out.jsonl", valves={"OLLAMA_HOSTS": a.url, "VISION_MODEL": "vision"})
+    assert runner.run(tmp_path / "in.jsonl")
+    assert sorted(c["model"] for c in a.chats) == ["custom", "vision"]
+    results = read_jsonl(tmp_path / "out.jsonl")
+    assert (results["custom"]["model"], results["default"]["model"]) == ("custom", "vision")
@@ -0,0 +1,123 @@
+import time
+import threading
+import requests
+from gta_pipe import OllamaPool, OllamaHTTPError, Pipe
+import pytest
+
+def chat(pool, model="m"):
+    return "".join(d.get("message", {}).get("content", "")
+                   for d in pool.stream_chat({"model": model, "messages": [], "stream": True}, timeout=10))
+
+def test_prefers_host_with_model_loaded(fake_ollama):
+    a = fake_ollama("A", models=["m:latest"])
+    b = fake_ollama("B", models=["m:latest"], loaded=["m:latest"])
+    pool = OllamaPool([a.url, b.url])
+    assert chat(pool) == "hi from B"
+    assert not a.chats
+
+def test_orders_by_availability_then_inflight(fake_ollama):
+    a = fake_ollama("A", models=["m:latest"])
+    b = fake_ollama("B", models=["m:latest"])
+    c = fake_ollama("C", models=["other:latest"])
+    pool = OllamaPool([c.url, a.url, b.url])
+    pool.hosts[a.url]["inflight"] = 2
+    assert pool.candidates("m") == [b.url, a.url, c.url]
+
+def test_untagged_model_matches_latest(fake_ollama):
+    a = fake_ollama("A")
+    b = fake_ollama("B", models=["llama3:latest"], loaded=["llama3:latest"])
+    pool = OllamaPool([a.url, b.url])
+    assert pool.candidates("llama3")[0] == b.url
+
+def test_fails_over_from_unreachable_host(fake_ollama, dead_url):
+    a = fake_ollama("A", models=["m:latest"])
+    pool = OllamaPool([dead_url, a.url])
+    pool.hosts[dead_url]["loaded"].add("m:latest")  # would be tried first if still healthy
+    assert chat(pool) == "hi from A"
+    assert not pool.hosts[dead_url]["healthy"]
+
+def test_fails_over_on_server_error(fake_ollama):
+    a = fake_ollama("A", models=["m:latest"], loaded=["m:latest"], chat_status=503)
+    b = fake_ollama("B", models=["m:latest"])
+    pool = OllamaPool([a.url, b.url])
+    assert chat(pool) == "hi from B"
+    assert len(a.chats) == 1
+    assert not pool.hosts[a.url]["healthy"]
+
+def test_404_tries_next_host(fake_ollama):
+    a = fake_ollama("A", models=["m:latest"], loaded=["m:latest"], chat_status=404)
+    b = fake_ollama("B")
+    pool = OllamaPool([a.url, b.url])
+    assert chat(pool) == "hi from B"
+    assert pool.hosts[a.url]["healthy"]
+    assert "m:latest" not in pool.hosts[a.url]["models"]
+
+def test_404_everywhere_raises(fake_ollama):
+    a = fake_ollama("A", chat_status=404)
+    pool = OllamaPool([a.url])
+    with pytest.raises(OllamaHTTPError) as e:
+        chat(pool)
+    assert e.value.status_code == 404
+
+def test_concurrent_refresh_probes_each_host_once(fake_ollama):
+    a = fake_ollama("A")
+    b = fake_ollama("B")
+    pool = OllamaPool([a.url, b.url])
+    threads = [threading.Thread(target=pool.refresh) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert (a.probes, b.probes) == (1, 1)
+
+def test_pipe_routes_through_pool(fake_ollama, dead_url):
+    a = fake_ollama("A", models=["m:latest"])
+    pipe = Pipe()
+    pipe.valves.OLLAMA_HOSTS = f"{dead_url},{a.url}"
+    pipe.valves.TEXT_MODEL = "m"
+    out = "".join(pipe.pipe({"messages": [{"role": "user", "content": "hello"}]}))
+    assert out.startswith("hi from A")
+    assert a.chats[0]["model"] == "m"
+
+def test_empty_stream_fails_over(fake_ollama):
+    a = fake_ollama("A", models=["m:latest"], loaded=["m:latest"], chunks=[], done=False)
+    b = fake_ollama("B", models=["m:latest"])
+    pool = OllamaPool([a.url, b.url])
+    assert chat(pool) == "hi from B"
+    assert not pool.hosts[a.url]["healthy"]
+
+def test_stopping_early_closes_the_connection(fake_ollama, monkeypatch):
+    a = fake_ollama("A", chunks=["x"] * 40, chunk_delay=0.02)
+    # Hold on to the response so only an explicit close (not garbage collection) can end it
+    responses = []
+    post = requests.post
+    monkeypatch.setattr(requests, "post", lambda *args, **kwargs: responses.append(post(*args, **kwargs)) or responses[-1])
+    pool = OllamaPool([a.url])
+    stream = pool.stream_chat({"model": "m", "messages": [], "stream": True}, timeout=10)
+    next(stream)
+    stream.close()
+    assert pool.hosts[a.url]["inflight"] == 0
+    deadline = time.time() + 2
+    while not a.disconnected and time.time() < deadline:
+        time.sleep(0.02)
+    assert a.disconnected
+
+def test_periodic_probes_run_in_background(fake_ollama):
+    a = fake_ollama("A", models=["m:latest"])
+    pool = OllamaPool([a.url], check_interval=0)
+    pool.candidates("m")
+    assert a.probes == 1
+    a.probe_delay = 1.0
+    started = time.time()
+    assert pool.candidates("m") == [a.url]
+    assert time.time() - started < 0.5
+
+def test_concurrent_first_requests_share_one_pool():
+    pipe = Pipe()
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(pipe._get_pool())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(p is pools[0] for p in pools)
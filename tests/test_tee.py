@@ -0,0 +1,139 @@
+import os
+from watchdog.events import FileMovedEvent
+from gta_pipe import Pipe, StreamTee
+from llm_docs_sync import VectorIndex, EmbeddingClient, DocSyncHandler, SyncState
+import pytest
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    return root
+
+def make_pipe(docs, host):
+    pipe = Pipe()
+    pipe.valves.OLLAMA_HOSTS = host.url
+    pipe.valves.TEXT_MODEL = "m"
+    pipe.valves.DOCS_DIR = str(docs)
+    return pipe
+
+def say(pipe, text):
+    return "".join(pipe.pipe({"messages": [{"role": "user", "content": text}]}))
+
+def test_save_commits_completed_response_without_stats(docs, fake_ollama):
+    a = fake_ollama("A", chunks=["hello ", "world"])
+    out = say(make_pipe(docs, a), "write a greeting and save to notes.md")
+    assert a.chats[0]["messages"][-1]["content"] == "write a greeting"
+    assert (docs / "notes.md").read_text() == "hello world"
+    assert "<details>" in out and "Saved 11 bytes" in out
+    assert os.listdir(docs) == ["notes.md"]
+
+@pytest.mark.parametrize("host", [{"chat_status": 404}, {"chunks": ["partial "], "done": False}])
+def test_failed_or_truncated_stream_leaves_file_alone(docs, fake_ollama, host):
+    a = fake_ollama("A", **host)
+    (docs / "notes.md").write_text("good")
+    out = say(make_pipe(docs, a), "write a greeting and save to notes.md")
+    assert "was not changed" in out and "Saved" not in out
+    assert (docs / "notes.md").read_text() == "good"
+    assert os.listdir(docs) == ["notes.md"]
+
+def test_closing_the_stream_early_aborts(docs, fake_ollama):
+    a = fake_ollama("A")
+    stream = make_pipe(docs, a).pipe({"messages": [{"role": "user", "content": "hi and save to z.md"}]})
+    next(stream)
+    stream.close()
+    assert os.listdir(docs) == []
+
+def test_append_and_rotation(docs, fake_ollama):
+    a = fake_ollama("A")
+    pipe = make_pipe(docs, a)
+    pipe.valves.TEE_MAX_BYTES = 15
+    for _ in range(3):
+        say(pipe, "hi, append to log.md")
+    assert (docs / "log.md").read_text() == "hi from A"
+    assert (docs / "log.md.1").read_text() == "hi from Ahi from A"
+
+def test_rolled_parts_are_discarded_on_abort(docs):
+    (docs / "log.md").write_text("old")
+    tee = StreamTee(docs / "log.md", max_bytes=4, backups=2)
+    for chunk in ["aaaa", "bbbb", "cccc"]:
+        tee.write(chunk)
+    tee.abort()
+    assert os.listdir(docs) == ["log.md"]
+
+    tee = StreamTee(docs / "log.md", max_bytes=4, backups=2)
+    for chunk in ["aaaa", "bbbb", "cccc"]:
+        tee.write(chunk)
+    tee.commit()
+    assert [(docs / n).read_text() for n in ["log.md", "log.md.1", "log.md.2"]] == ["cccc", "bbbb", "aaaa"]
+
+def test_zero_backups_never_rolls_over(docs):
+    tee = StreamTee(docs / "log.md", max_bytes=4, backups=0)
+    for chunk in ["aaaa", "bbbb"]:
+        tee.write(chunk)
+    tee.commit()
+    assert os.listdir(docs) == ["log.md"]
+    assert (docs / "log.md").read_text() == "aaaabbbb"
+
+class RecordingClient:
+    api_key = "test"
+
+    def __init__(self):
+        self.uploads = []
+
+    def upload_file(self, filepath):
+        self.uploads.append(os.path.basename(filepath))
+        return {"id": filepath}
+
+def test_renames_are_synced_but_index_files_are_not(docs, fake_embedder):
+    index = VectorIndex(docs / ".vector_index", docs, EmbeddingClient(fake_embedder.url, "fake"))
+    client = RecordingClient()
+    handler = DocSyncHandler(SyncState(str(docs / ".sync_state.db")), client, index, watch_dir=str(docs))
+
+    (docs / "notes.md").write_text("saved by rename")
+    handler.on_moved(FileMovedEvent(str(docs / ".notes.md.x1.tmp"), str(docs / "notes.md")))
+    assert list(index.ids["files"]) == ["notes.md"]
+
+    handler.on_moved(FileMovedEvent(str(index.index_dir / "ids.tmp"), str(index.ids_path)))
+    assert list(index.ids["files"]) == ["notes.md"]
+    assert client.uploads == ["notes.md"]
+    assert fake_embedder.batches == [1]
+
+@pytest.mark.parametrize("text, op", [
+    ("write a haiku and save to h.md", "tee"),
+    ("summarise the plan, then append to log.md", "tee_append"),
+    ("great, save this to notes.md", "write_previous"),
+    ("thanks, save it to notes.md", "write_previous"),
+    ("perfect, save the response to notes.md", "write_previous"),
+    ("ok and save that to notes.md", "write_previous"),
+    ("great, save to notes.md", "write_previous"),
+    ("google: weather in paris and save to w.md", "tee_unsupported"),
+    ("read a.md and save to b.md", "tee_unsupported"),
+])
+def test_save_phrasings(text, op):
+    assert Pipe()._check_special_request(text)[0] == op
+
+def test_saving_the_previous_reply_does_not_call_the_model(docs, fake_ollama):
+    a = fake_ollama("A")
+    pipe = make_pipe(docs, a)
+    out = "".join(pipe.pipe({"messages": [
+        {"role": "assistant", "content": "the earlier answer"},
+        {"role": "user", "content": "thanks, save it to notes.md"},
+    ]}))
+    assert "Saving previous response" in out
+    assert (docs / "notes.md").read_text() == "the earlier answer"
+    assert not a.chats
+
+def test_web_search_with_save_clause_is_rejected(docs, fake_ollama):
+    a = fake_ollama("A")
+    out = say(make_pipe(docs, a), "google: weather in paris and save to w.md")
+    assert "[Error]" in out
+    assert not a.chats and os.listdir(docs) == []
+
+@pytest.mark.parametrize("target", ["../../escape.md", "/tmp/escape.sh"])
+def test_save_target_must_stay_in_docs_dir(docs, fake_ollama, target):
+    a = fake_ollama("A")
+    out = say(make_pipe(docs, a), f"write a poem and save to {target}")
+    assert "Cannot write outside" in out
+    assert not a.chats
+    assert not (docs / target).resolve().exists()
@@ -0,0 +1,117 @@
+import llm_docs_sync
+from llm_docs_sync import VectorIndex, EmbeddingClient, DocSyncHandler, SyncState, initial_index
+from gta_file_reader_tool import Tools
+from gta_pipe import Pipe
+import pytest
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    return root
+
+@pytest.fixture
+def index(docs, fake_embedder):
+    return VectorIndex(docs / ".vector_index", docs, EmbeddingClient(fake_embedder.url, "fake"))
+
+def test_unchanged_files_are_not_reembedded(docs, index, fake_embedder):
+    (docs / "a.md").write_text("apple banana")
+    assert index.update_file(docs / "a.md")
+    assert not index.update_file(docs / "a.md")
+    assert fake_embedder.batches == [1]
+
+def test_modify_and_delete_reuse_rows_in_place(docs, index):
+    path = docs / "a.md"
+    path.write_text("first version")
+    index.update_file(path)
+    path.write_text("second version")
+    index.update_file(path)
+    assert index.ids["rows"] == [None, ["a.md", 0, 14]]
+    path.write_text("third version")
+    index.update_file(path)
+    assert index.ids["rows"] == [["a.md", 0, 13], None]
+    assert not index.matrix[1].any()
+
+    capacity = index.matrix.shape[0]
+    path.unlink()
+    assert index.remove_file(path)
+    (docs / "b.md").write_text("other file")
+    index.update_file(docs / "b.md")
+    assert index.ids["rows"] == [["b.md", 0, 10], None]
+    assert index.matrix.shape[0] == capacity
+
+def test_index_reopens_from_disk(docs, index, fake_embedder):
+    (docs / "a.md").write_text("apple banana")
+    index.update_file(docs / "a.md")
+    reopened = VectorIndex(docs / ".vector_index", docs, EmbeddingClient(fake_embedder.url, "fake"))
+    assert reopened.ids == index.ids
+    assert not reopened.update_file(docs / "a.md")
+
+def test_large_files_embed_in_batches_and_oversized_files_are_skipped(docs, index, fake_embedder, monkeypatch):
+    monkeypatch.setattr(llm_docs_sync, "EMBED_BATCH", 4)
+    (docs / "big.txt").write_text("word " * 3000)
+    index.update_file(docs / "big.txt")
+    assert max(fake_embedder.batches) == 4
+    assert len(index.ids["files"]["big.txt"]["rows"]) == sum(fake_embedder.batches)
+
+    monkeypatch.setattr(llm_docs_sync, "MAX_INDEX_SIZE", 1000)
+    (docs / "big.txt").write_text("word " * 3001)
+    assert not index.update_file(docs / "big.txt")
+    assert "big.txt" not in index.ids["files"]
+
+def test_index_never_indexes_itself(docs, index):
+    (docs / "a.json").write_text('{"fruit": "apple"}')
+    initial_index(str(docs), index)
+    assert list(index.ids["files"]) == ["a.json"]
+    assert index.ids_path.exists()
+
+    handler = DocSyncHandler(SyncState(str(docs / ".sync_state.db")), None, index, watch_dir=str(docs))
+    assert handler._should_sync(str(docs / "a.json"))
+    assert not handler._should_sync(str(index.ids_path))
+    assert not handler._should_sync(str(docs / ".hidden" / "notes.md"))
+
+def test_tool_semantic_search_ranks_by_cosine(docs, index, fake_embedder):
+    (docs / "fruit.md").write_text("apple banana cherry")
+    (docs / "space.md").write_text("rocket engine fuel")
+    initial_index(str(docs), index)
+    tools = Tools()
+    tools.valves.DOCS_DIR = str(docs)
+    tools.valves.EMBED_URL = fake_embedder.url
+    result = tools.semantic_search("rocket fuel", top_k=1)
+    assert "space.md" in result and "fruit.md" not in result
+
+def test_stale_rows_do_not_cost_results(docs, index, fake_embedder):
+    for i in range(6):
+        (docs / f"rocket{i}.md").write_text("rocket fuel " * (i + 1))
+    (docs / "fruit.md").write_text("apple banana")
+    (docs / "fuel.md").write_text("fuel prices")
+    initial_index(str(docs), index)
+    for i in range(6):
+        (docs / f"rocket{i}.md").unlink()  # deleted while the sync service was down
+
+    tools = Tools()
+    tools.valves.DOCS_DIR = str(docs)
+    tools.valves.EMBED_URL = fake_embedder.url
+    result = tools.semantic_search("rocket fuel", top_k=2)
+    assert "fuel.md" in result and "fruit.md" in result and "rocket" not in result.split(":", 1)[1]
+
+    pipe = Pipe()
+    pipe.valves.DOCS_DIR = str(docs)
+    pipe.valves.EMBED_URL = fake_embedder.url
+    assert pipe._semantic_search("rocket fuel", top_k=2).count("📄") == 2
+
+def test_query_dimension_mismatch_is_reported(docs, index, fake_embedder, monkeypatch):
+    (docs / "a.md").write_text("apple")
+    initial_index(str(docs), index)
+    monkeypatch.setattr(type(fake_embedder), "DIM", 16)
+
+    tools = Tools()
+    tools.valves.DOCS_DIR = str(docs)
+    tools.valves.EMBED_URL = fake_embedder.url
+    assert "16 dimensions but the index has 32" in tools.semantic_search("apple")
+
+    pipe = Pipe()
+    pipe.valves.DOCS_DIR = str(docs)
+    pipe.valves.EMBED_URL = fake_embedder.url
+    out = "".join(pipe.pipe({"messages": [{"role": "user", "content": "docs: apple"}]}))
+    assert "16 dimensions but the index has 32" in out